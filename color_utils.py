@@ -0,0 +1,69 @@
+import streamlit as st
+import plotly.graph_objects as go
+import numpy as np
+
+# Shared colour and trace helpers for the color viewer pages.
+# The cached trace and layout constants below are built once; go.Figure copies what it is
+# given, so they are never mutated
+
+# --- Color Formatting ---
+# ASCII bytes of the two hex digits for every 0-255 channel value, indexed by the value itself
+_HEX_DIGITS = np.frombuffer("".join(f"{v:02x}" for v in range(256)).encode(), dtype=np.uint8).reshape(256, 2)
+
+def to_hex(r, g, b):
+    # Write "#rrggbb" into one preallocated byte buffer, then view each 7-byte row as a string
+    out = np.empty((len(r), 7), dtype=np.uint8)
+    out[:, 0] = ord("#")
+    out[:, 1:3] = _HEX_DIGITS[r]
+    out[:, 3:5] = _HEX_DIGITS[g]
+    out[:, 5:7] = _HEX_DIGITS[b]
+    return out.view("S7").ravel().astype(str).tolist()
+
+# --- Shared Traces ---
+# Point cap for the 1D axis plots; larger datasets are stride-sampled
+MAX_AXIS_POINTS = 5000
+
+def downsample(data, max_points=MAX_AXIS_POINTS):
+    if len(data) <= max_points:
+        return data
+    idx = np.linspace(0, len(data) - 1, max_points).astype(int)
+    return data.iloc[idx]
+
+@st.cache_resource
+def lab_axes_trace():
+    # Axes lines (always visible, hidden from legend)
+    # One trace for all three axes; the None entries break the line between them
+    return go.Scatter3d(
+        x=[0, 0, None, -128, 127, None, 0, 0],
+        y=[0, 0, None, 0, 0, None, -128, 127],
+        z=[0, 100, None, 50, 50, None, 50, 50],
+        mode='lines', line=dict(color='black', width=4),
+        hoverinfo='none',
+        showlegend=False
+    )
+
+# --- Shared Layout ---
+HOVERLABEL = dict(
+    font_color="#F21578",
+    bordercolor="#F21578",
+    bgcolor="white"
+)
+
+PLOT_MARGIN = dict(r=20, l=20, b=40, t=40)
+
+SCENE_LAYOUT = dict(
+    scene=dict(
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False),
+        zaxis=dict(visible=False),
+        annotations=[
+            dict(x=0, y=0, z=105, text="<b>L</b>", showarrow=False, font=dict(size=14, color="#F21578")),
+            dict(x=135, y=0, z=50, text="<b>A</b>", showarrow=False, font=dict(size=14, color="#F21578")),
+            dict(x=0, y=135, z=50, text="<b>B</b>", showarrow=False, font=dict(size=14, color="#F21578"))
+        ],
+        camera=dict(projection=dict(type='orthographic'))
+    ),
+    margin=dict(r=0, l=0, b=0, t=40),
+    showlegend=True,
+    hoverlabel=HOVERLABEL
+)
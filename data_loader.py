@@ -0,0 +1,103 @@
+import os
+
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+from color_utils import to_hex
+
+# Shared, cached CSV loading for the color viewer pages
+
+# --- Data Loading ---
+DATA_PATH = "color_data.csv"
+
+def data_version(path=DATA_PATH):
+    # The CSV's modification time; passed to the cached builders so an edited file is re-read
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+# Column types for the typed CSV parse. Text columns are kept verbatim (palette "1", not 1.0);
+# float32 coordinates halve what is handed to Plotly. R/G/B are read as float so out-of-range
+# values survive until the clip below and are only then narrowed to uint8
+TEXT_DTYPES = {'ID (company, number)': 'string', 'Marking': 'string', 'Group': 'string'}
+CSV_DTYPES = {
+    **TEXT_DTYPES,
+    'R': 'float32', 'G': 'float32', 'B': 'float32',
+    'L_star': 'float32', 'A_star': 'float32', 'B_star': 'float32',
+}
+
+@st.cache_data(max_entries=1)
+def load_data(version, path=DATA_PATH):
+    required_coords = ['L_star', 'A_star', 'B_star']
+    required_colors = ['R', 'G', 'B']
+    required_info = ['ID (company, number)', 'Marking', 'Group']
+    required_cols = set(required_coords + required_colors + required_info)
+
+    try:
+        try:
+            df = pd.read_csv(path, usecols=lambda c: c in required_cols, dtype=CSV_DTYPES)
+        except ValueError:
+            # A non-numeric cell defeats the typed parse; re-read with only the text types
+            # and let the numeric coercion below clean up
+            df = pd.read_csv(path, usecols=lambda c: c in required_cols, dtype=TEXT_DTYPES)
+    except FileNotFoundError:
+        st.error(f"Error: `{path}` not found. Please make sure it's in your GitHub repository.")
+        return None, None, None, None
+
+    for col in required_coords + required_colors + required_info:
+        if col not in df.columns:
+            st.error(f"Critical Error: Column '{col}' is missing from your `{path}` file.")
+            return None, None, None, None
+
+    # Palette names become a categorical: grouping and mapping then work on integer codes
+    df['Group'] = df['Group'].fillna('n/a').astype(str).str.strip().astype('category')
+
+    # Compact dtypes for everything handed to Plotly: uint8 channels, float32 coordinates
+    # (already float32 after the typed parse; this covers the fallback re-read)
+    for col in required_colors:
+        s = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        df[col] = np.clip(s, 0, 255).astype(np.uint8)
+
+    for col in required_coords:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+
+    # Numeric palette names first, in numeric order, then the rest alphabetically.
+    # A name is numeric if it is digits with at most one '.'; the sort and the labels share this test.
+    # np.lexsort treats its last key as the primary one.
+    names = pd.Series(np.asarray(df['Group'].cat.categories, dtype=str))
+    is_numeric = names.str.replace('.', '', n=1, regex=False).str.isdigit().to_numpy()
+    numeric = pd.to_numeric(names.where(is_numeric), errors='coerce').to_numpy()
+    names = names.to_numpy()
+    group_names = names[np.lexsort((names, numeric, ~is_numeric))].tolist()
+    df['Group'] = df['Group'].cat.reorder_categories(group_names)
+
+    # Marker colours and palette labels ("1.0" -> "1") are built once here rather than on every rerun
+    df['color'] = to_hex(df['R'].to_numpy(), df['G'].to_numpy(), df['B'].to_numpy())
+    palette_labels = {
+        name: str(int(value)) if numeric_name else name
+        for name, value, numeric_name in zip(names, numeric, is_numeric)
+    }
+    df['palette'] = df['Group'].map(palette_labels)
+
+    # One groupby pass over the category codes instead of a full-table comparison per palette;
+    # the categories are in palette order, so the groups already come out in display order
+    grouped_data = [
+        {"groupName": name, "legendLabel": f"palette {palette_labels[name]}", "data": group_df}
+        for name, group_df in df.groupby('Group', observed=True)
+    ]
+
+    # Every row in palette order, for the figures drawn as a single trace. A stable sort on the
+    # ordered categorical keeps each palette's rows in file order, and a header-only CSV yields an
+    # empty frame rather than an empty concat
+    palette_data = df.sort_values('Group', kind='stable', ignore_index=True)
+
+    # Every row ordered by numeric marking, for the marking-ordered graph
+    marking_data = (
+        palette_data.assign(Marking_numeric=pd.to_numeric(palette_data['Marking'], errors='coerce'))
+        .sort_values('Marking_numeric')
+        .reset_index(drop=True)
+    )
+
+    return grouped_data, group_names, palette_data, marking_data
@@ -1,7 +1,9 @@
 import streamlit as st
 import plotly.graph_objects as go
 import numpy as np
-import pandas as pd
+
+from color_utils import HOVERLABEL, PLOT_MARGIN, SCENE_LAYOUT, downsample, lab_axes_trace
+from data_loader import data_version, load_data
 
 # --- Page Setup ---
 st.set_page_config(layout="wide")
@@ -21,269 +23,143 @@ st.markdown("""
 st.title("1910's Color Cards Data")
 
 # --- 1. Load Data ---
-@st.cache_data
-def load_data():
-    try:
-        df = pd.read_csv("color_data.csv")
-    except FileNotFoundError:
-        st.error("Error: `color_data.csv` not found. Please make sure it's in your GitHub repository.")
-        return None, None
-
-    required_coords = ['L_star', 'A_star', 'B_star']
-    required_colors = ['R', 'G', 'B']
-    required_info = ['ID (company, number)', 'Marking', 'Group']
-
-    for col in required_coords + required_colors + required_info:
-        if col not in df.columns:
-            st.error(f"Critical Error: Column '{col}' is missing from your `color_data.csv` file.")
-            return None, None
-
-    df['Group'] = df['Group'].fillna('n/a')
-
-    for col in required_colors:
-        s = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        df[col] = np.clip(s, 0, 255).astype(int)
-
-    def sort_key(x):
-        s = str(x).strip()
-        return (not s.replace('.', '', 1).isdigit(), float(s) if s.replace('.', '', 1).isdigit() else s)
-
-    group_names = sorted(df['Group'].unique(), key=sort_key)
-
-    grouped_data = []
-    for name in group_names:
-        group_df = df[df['Group'].astype(str).str.strip() == str(name).strip()]
-        grouped_data.append({"groupName": name, "data": group_df})
-
-    return grouped_data, group_names
-
-groups, group_names = load_data()
+version = data_version()
+groups, group_names, palette_data, marking_data = load_data(version)
 
 # --- 2. Build 3D Plot ---
-fig = go.Figure()
-
-# Axes lines (always visible, hidden from legend)
-fig.add_trace(go.Scatter3d(
-    x=[0, 0], y=[0, 0], z=[0, 100],
-    mode='lines', line=dict(color='black', width=4),
-    hoverinfo='none',
-    showlegend=False
-))
-fig.add_trace(go.Scatter3d(
-    x=[-128, 127], y=[0, 0], z=[50, 50],
-    mode='lines', line=dict(color='black', width=4),
-    hoverinfo='none',
-    showlegend=False
-))
-fig.add_trace(go.Scatter3d(
-    x=[0, 0], y=[-128, 127], z=[50, 50],
-    mode='lines', line=dict(color='black', width=4),
-    hoverinfo='none',
-    showlegend=False
-))
-
-# Plot each palette
-if groups:
-    for group in groups:
-        group_name = str(group["groupName"]).strip()
+# `_groups` is left out of the cache key (Streamlit skips underscore params); `version` stands in for it.
+# cache_resource hands every rerun the same Figure instead of unpickling a copy; st.plotly_chart does not mutate it.
+# max_entries keeps only the current version's figures; cache_resource never evicts on its own.
+@st.cache_resource(max_entries=1)
+def build_3d_fig(_groups, version):
+    # Traces are collected as plain dicts and validated once, by the Figure constructor
+    traces = [lab_axes_trace()]
+
+    # Plot each palette
+    for group in _groups or []:
+        legend_label = group["legendLabel"]
         group_data = group["data"]
 
-        is_numeric = group_name.replace('.', '', 1).isdigit()
-        legend_label = f"palette {int(float(group_name))}" if is_numeric else f"palette {group_name}"
-
-        marker_colors = [f"rgb({row['R']}, {row['G']}, {row['B']})" for _, row in group_data.iterrows()]
-
-        hover_texts = [
-            f"<span style='color:rgb({row['R']},{row['G']},{row['B']});'>"
-            f"<b>Marking:</b> {row['Marking']}<br>"
-            f"<b>palette:</b> {legend_label.replace('palette ', '')}<br><br>"
-            f"<b>L*:</b> {row['L_star']:.2f}<br>"
-            f"<b>a*:</b> {row['A_star']:.2f}<br>"
-            f"<b>b*:</b> {row['B_star']:.2f}</span><extra></extra>"
-            for _, row in group_data.iterrows()
-        ]
-
-        fig.add_trace(go.Scatter3d(
-            x=group_data['A_star'],
-            y=group_data['B_star'],
-            z=group_data['L_star'],
+        traces.append(dict(
+            type='scatter3d',
+            x=group_data['A_star'].to_numpy(dtype=np.float32),
+            y=group_data['B_star'].to_numpy(dtype=np.float32),
+            z=group_data['L_star'].to_numpy(dtype=np.float32),
             mode='markers',
-            marker=dict(size=7, opacity=1.0, color=marker_colors),
+            marker=dict(size=7, opacity=1.0, color=group_data['color'].tolist()),
             name=legend_label,
-            hovertemplate="%{text}",
-            text=hover_texts
+            # The browser fills in the label: customdata holds the colour and marking, x/y/z are a*/b*/L*
+            customdata=np.column_stack([group_data['color'], group_data['Marking'].astype(str)]),
+            hovertemplate=(
+                "<span style='color:%{customdata[0]};'>"
+                "<b>Marking:</b> %{customdata[1]}<br>"
+                f"<b>palette:</b> {legend_label.replace('palette ', '')}<br><br>"
+                "<b>L*:</b> %{z:.2f}<br>"
+                "<b>a*:</b> %{x:.2f}<br>"
+                "<b>b*:</b> %{y:.2f}</span><extra></extra>"
+            )
         ))
 
-# --- 3. Layout and Display ---
-fig.update_layout(
-    scene=dict(
-        xaxis=dict(visible=False),
-        yaxis=dict(visible=False),
-        zaxis=dict(visible=False),
-        annotations=[
-            dict(x=0, y=0, z=105, text="<b>L</b>", showarrow=False, font=dict(size=14, color="#F21578")),
-            dict(x=135, y=0, z=50, text="<b>A</b>", showarrow=False, font=dict(size=14, color="#F21578")),
-            dict(x=0, y=135, z=50, text="<b>B</b>", showarrow=False, font=dict(size=14, color="#F21578"))
-        ],
-        camera=dict(projection=dict(type='orthographic'))
-    ),
-    margin=dict(r=0, l=0, b=0, t=40),
-    showlegend=True,
-    hoverlabel=dict(
-        font_color="#F21578",
-        bordercolor="#F21578",
-        bgcolor="white"
-    )
-)
-
-st.plotly_chart(fig, use_container_width=True)
-
-# --- 4. Isolated L-axis Graph ---
-if groups:
-    l_axis_fig = go.Figure()
-
-    for group in groups:
-        raw_name = str(group["groupName"]).strip()
-
-        if raw_name.replace('.', '', 1).isdigit():
-            group_name = str(int(float(raw_name)))
-        else:
-            group_name = raw_name
-
-        group_data = group["data"]
-        marker_colors = [f"rgb({row['R']},{row['G']},{row['B']})" for _, row in group_data.iterrows()]
-
-        l_axis_fig.add_trace(go.Scatter(
-            x=[group_name]*len(group_data),
-            y=group_data['L_star'],
+    fig = go.Figure(data=traces, layout=SCENE_LAYOUT)
+
+    return fig
+
+# --- 3. Display ---
+# Every chart sits in a state-tracking expander (on_change="rerun"): a closed expander's
+# figure is neither built nor sent to the browser, and opening one builds it once
+view_3d = st.expander("3D View", expanded=True, on_change="rerun")
+with view_3d:
+    if view_3d.open:
+        st.plotly_chart(build_3d_fig(groups, version))
+
+# --- 4. Isolated Axis Graphs ---
+# One cache entry per axis chart (L*, A*, B*)
+@st.cache_resource(max_entries=3)
+def build_axis_fig(_palette_data, version, x_col, y_col, xaxis_title, yaxis_title):
+    # One trace per figure: x carries the palette, marker colours the card colours
+    axis_data = downsample(_palette_data)
+
+    axis_fig = go.Figure(
+        data=[dict(
+            type='scattergl',
+            x=axis_data[x_col].to_numpy(),
+            y=axis_data[y_col].to_numpy(dtype=np.float32),
             mode='markers',
-            marker=dict(size=10, color=marker_colors),
-            name=f"palette {group_name}"
-        ))
-
-    l_axis_fig.update_layout(
-        xaxis_title="Palette",
-        yaxis_title="L* (Lightness)",
-        plot_bgcolor="white",
-        hoverlabel=dict(
-            font_color="#F21578",
-            bordercolor="#F21578",
-            bgcolor="white"
-        ),
-        margin=dict(r=20, l=20, b=40, t=40)
+            marker=dict(size=10, color=axis_data['color'].to_numpy())
+        )],
+        layout=dict(
+            xaxis_title=xaxis_title,
+            yaxis_title=yaxis_title,
+            plot_bgcolor="white",
+            hoverlabel=HOVERLABEL,
+            margin=PLOT_MARGIN
+        )
     )
 
-    st.plotly_chart(l_axis_fig, use_container_width=True)
-
+    return axis_fig
 
-# --- 4B. A* Axis Distribution ---
 if groups:
-    a_axis_fig = go.Figure()
+    # 4. L* axis, labelled with the short palette names
+    view_l = st.expander("L* Distribution", on_change="rerun")
+    with view_l:
+        if view_l.open:
+            st.plotly_chart(
+                build_axis_fig(palette_data, version, 'palette', 'L_star', "Palette", "L* (Lightness)")
+            )
+
+    # 4B. A* axis distribution, labelled with the group names as written in the CSV
+    view_a = st.expander("A* Distribution", on_change="rerun")
+    with view_a:
+        if view_a.open:
+            st.plotly_chart(
+                build_axis_fig(palette_data, version, 'Group', 'A_star', "Palette Group", "A* (Green–Red)")
+            )
+
+    # 4C. B* axis distribution
+    view_b = st.expander("B* Distribution", on_change="rerun")
+    with view_b:
+        if view_b.open:
+            st.plotly_chart(
+                build_axis_fig(palette_data, version, 'Group', 'B_star', "Palette Group", "B* (Blue–Yellow)")
+            )
 
-    for group in groups:
-        group_name = str(group["groupName"]).strip()
-        group_data = group["data"]
-        marker_colors = [f"rgb({row['R']},{row['G']},{row['B']})" for _, row in group_data.iterrows()]
-
-        a_axis_fig.add_trace(go.Scatter(
-            x=[group_name]*len(group_data),
-            y=group_data['A_star'],
+# --- 5. Marking-Ordered Graph ---
+@st.cache_resource(max_entries=1)
+def build_marking_fig(_marking_data, version):
+    marker_colors = _marking_data['color'].to_numpy()
+
+    marking_fig = go.Figure(
+        data=[dict(
+            type='scattergl',
+            x=_marking_data['Marking_numeric'].to_numpy(),
+            y=np.ones(len(_marking_data), dtype=np.uint8),  # just place all on the same horizontal line
             mode='markers',
             marker=dict(size=10, color=marker_colors),
-            name=f"palette {group_name}"
-        ))
-
-    a_axis_fig.update_layout(
-        xaxis_title="Palette Group",
-        yaxis_title="A* (Green–Red)",
-        plot_bgcolor="white",
-        hoverlabel=dict(
-            font_color="#F21578",
-            bordercolor="#F21578",
-            bgcolor="white"
-        ),
-        margin=dict(r=20, l=20, b=40, t=40)
+            # The browser fills in the label: the marking is x, the palette group is text,
+            # and customdata is a numeric float32 (N, 3) array of L*, a*, b*
+            text=_marking_data['Group'].to_numpy(),
+            customdata=_marking_data[['L_star', 'A_star', 'B_star']].to_numpy(dtype=np.float32),
+            hovertemplate=(
+                "<b>Marking:</b> %{x}<br>"
+                "<b>Palette Group:</b> %{text}<br>"
+                "<b>L*:</b> %{customdata[0]:.2f}<br>"
+                "<b>a*:</b> %{customdata[1]:.2f}<br>"
+                "<b>b*:</b> %{customdata[2]:.2f}<extra></extra>"
+            )
+        )],
+        layout=dict(
+            xaxis_title="Marking",
+            yaxis=dict(visible=False),  # hide y-axis
+            plot_bgcolor="white",
+            hoverlabel=HOVERLABEL,
+            margin=PLOT_MARGIN
+        )
     )
 
-    st.plotly_chart(a_axis_fig, use_container_width=True)
+    return marking_fig
 
-# --- 4C. B* Axis Distribution ---
 if groups:
-    b_axis_fig = go.Figure()
-
-    for group in groups:
-        group_name = str(group["groupName"]).strip()
-        group_data = group["data"]
-        marker_colors = [f"rgb({row['R']},{row['G']},{row['B']})" for _, row in group_data.iterrows()]
-
-        b_axis_fig.add_trace(go.Scatter(
-            x=[group_name]*len(group_data),
-            y=group_data['B_star'],
-            mode='markers',
-            marker=dict(size=10, color=marker_colors),
-            name=f"palette {group_name}"
-        ))
-
-    b_axis_fig.update_layout(
-        xaxis_title="Palette Group",
-        yaxis_title="B* (Blue–Yellow)",
-        plot_bgcolor="white",
-        hoverlabel=dict(
-            font_color="#F21578",
-            bordercolor="#F21578",
-            bgcolor="white"
-        ),
-        margin=dict(r=20, l=20, b=40, t=40)
-    )
-
-    st.plotly_chart(b_axis_fig, use_container_width=True)
-
-
-
-# --- 5. Marking-Ordered Graph ---
-if groups:
-    marking_fig = go.Figure()
-
-    # Combine all groups into a single DataFrame for ordering
-    all_data = pd.concat([group["data"] for group in groups], ignore_index=True)
-
-    # Ensure 'Marking' is numeric for proper sorting
-    all_data['Marking_numeric'] = pd.to_numeric(all_data['Marking'], errors='coerce')
-    all_data = all_data.sort_values('Marking_numeric')
-
-    marker_colors = [f"rgb({row['R']},{row['G']},{row['B']})" for _, row in all_data.iterrows()]
-
-    hover_texts = [
-        f"<b>Marking:</b> {row['Marking']}<br>"
-        f"<b>Palette Group:</b> {row['Group']}<br>"
-        f"<b>L*:</b> {row['L_star']:.2f}<br>"
-        f"<b>a*:</b> {row['A_star']:.2f}<br>"
-        f"<b>b*:</b> {row['B_star']:.2f}<extra></extra>"
-        for _, row in all_data.iterrows()
-    ]
-
-    marking_fig.add_trace(go.Scatter(
-        x=all_data['Marking_numeric'],
-        y=[1]*len(all_data),  # just place all on the same horizontal line
-        mode='markers',
-        marker=dict(size=10, color=marker_colors),
-        text=hover_texts,
-        hoverinfo='text'
-    ))
-
-    marking_fig.update_layout(
-        xaxis_title="Marking",
-        yaxis=dict(visible=False),  # hide y-axis
-        plot_bgcolor="white",
-        hoverlabel=dict(
-            font_color="#F21578",
-            bordercolor="#F21578",
-            bgcolor="white"
-        ),
-        margin=dict(r=20, l=20, b=40, t=40)
-    )
-
-    st.plotly_chart(marking_fig, use_container_width=True)
-
-
-
+    view_marking = st.expander("Marking Order", on_change="rerun")
+    with view_marking:
+        if view_marking.open:
+            st.plotly_chart(build_marking_fig(marking_data, version))